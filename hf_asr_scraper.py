@@ -3,11 +3,20 @@
 Simple script to get ASR models for African languages using HuggingFace API
 """
 
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
+import asyncio
+import atexit
+import csv
+import logging
+import shelve
 import time
-from typing import Dict, List
+import httpx
+import orjson
+import pandas as pd
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Set
+
+log = logging.getLogger(__name__)
 
 # Target languages with their HF language codes
 LANGUAGES = {
@@ -22,224 +31,249 @@ LANGUAGES = {
     'Sidoma': ['sid'],
     'Oromo': ['om'],
     'Wolaytta': ['wal'],
-    
+
 }
 
+# On-disk stats cache shared across runs
+CACHE_FILE = '.hf_asr_cache'
+CACHE_TTL = 86400  # Seconds before a persisted entry goes stale
+
+@dataclass(slots=True)
+class ModelStats:
+    """Download and like counts for a single HF model"""
+    name: str
+    url: str
+    downloads: int
+    downloads_all_time: int
+    likes: int
+
 class HuggingFaceASRScraper:
-    def __init__(self):
-        self.base_url = "https://huggingface.co/models"
+    def __init__(self, max_concurrency: int = 16):
         self.api_base = "https://huggingface.co/api/models"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        })
-        self.model_cache = {}  # Cache for model stats
-        
-    def get_model_names_for_language(self, language_code: str, max_pages: int = 3) -> List[str]:
-        """Get model names for a specific language code"""
-        model_names = []
-        
-        for page in range(max_pages):
-            url = f"{self.base_url}?pipeline_tag=automatic-speech-recognition&language={language_code}&sort=trending"
-            if page > 0:
-                url += f"&p={page}"
-                
-            try:
-                print(f"Fetching page {page+1} for language: {language_code}")
-                response = self.session.get(url, timeout=10)
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
+            'Accept-Encoding': 'gzip, br'
+        }
+        self.session = None  # httpx client, opened in scrape_all_languages
+        self.semaphore = asyncio.Semaphore(max_concurrency)  # Cap in-flight requests to respect HF rate limits
+        self.model_cache: Dict[str, ModelStats] = {}  # In-memory cache for model stats
+        self.model_to_languages: Dict[str, Set[str]] = defaultdict(set)  # Filled during scraping
+        self.names_cache: Dict[str, List[str]] = {}  # Memoizes list-API results per language code
+        self.disk_cache = shelve.open(CACHE_FILE, writeback=False)  # Persists stats across runs
+        atexit.register(self.disk_cache.close)
+
+    async def _get(self, url: str, retries: int = 3, backoff_factor: float = 0.3) -> bytes:
+        """GET a URL through the shared session, retrying transient failures with backoff"""
+        for attempt in range(retries + 1):
+            async with self.semaphore:
+                response = await self.session.get(url)
+                if response.status_code in (429, 502, 503, 504) and attempt < retries:
+                    # Honour the server's Retry-After when given, else back off exponentially
+                    try:
+                        delay = float(response.headers.get('Retry-After', ''))
+                    except ValueError:
+                        delay = backoff_factor * (2 ** attempt)
+                    await asyncio.sleep(delay)
+                    continue
                 response.raise_for_status()
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
-                page_models = self.parse_model_names_from_page(soup)
-                
-                if not page_models:
-                    break
-                    
-                model_names.extend(page_models)
-                time.sleep(0.5)
-                
-            except Exception as e:
-                print(f"Error fetching {url}: {e}")
-                break
-                
-        return model_names
-    
-    def parse_model_names_from_page(self, soup: BeautifulSoup) -> List[str]:
-        """Parse model names from search results page"""
-        model_names = []
-        
-        # Find all model cards
-        model_cards = soup.find_all('article', class_='overview-card-wrapper')
-        
-        for card in model_cards:
-            try:
-                link = card.find('a', href=True)
-                if link:
-                    href = link.get('href', '')
-                    model_name = href.lstrip('/')
-                    if model_name and model_name != '#':
-                        model_names.append(model_name)
-            except Exception:
-                continue
-                
-        return model_names
-    
-    def get_model_stats(self, model_name: str) -> Dict:
+                return response.content
+
+    async def get_model_names_for_language(self, language_code: str) -> List[str]:
+        """Get model names for a specific language code from the HF list API"""
+
+        # Repeated calls for the same code are answered from memory
+        if language_code in self.names_cache:
+            return self.names_cache[language_code]
+
+        url = (f"{self.api_base}?pipeline_tag=automatic-speech-recognition"
+               f"&language={language_code}&sort=trending&limit=1000"
+               f"&expand[]=downloads&expand[]=downloadsAllTime&expand[]=likes")
+
+        try:
+            log.debug(f"Fetching model list for language: {language_code}")
+            data = orjson.loads(await self._get(url))
+
+            # The listing already carries the expanded stats fields, so cache
+            # them now and spare a per-model stats request later
+            for model in data:
+                if model['id'] not in self.model_cache:
+                    self.cache_stats(model['id'], ModelStats(
+                        name=model['id'],
+                        url=f"https://huggingface.co/{model['id']}",
+                        downloads=model.get('downloads', 0),
+                        downloads_all_time=model.get('downloadsAllTime', 0),
+                        likes=model.get('likes', 0)
+                    ))
+
+            model_names = [model['id'] for model in data]
+            self.names_cache[language_code] = model_names
+            return model_names
+
+        except Exception as e:
+            log.warning(f"Error fetching {url}: {e}")
+            return []
+
+    async def get_model_stats(self, model_name: str) -> ModelStats:
         """Get download and like counts for a model using HF API (with caching)"""
-        
-        # Check cache first
+
+        # Check the in-memory cache first
         if model_name in self.model_cache:
-            print(f"Using cached stats for: {model_name}")
+            log.debug(f"Using cached stats for: {model_name}")
             return self.model_cache[model_name]
-        
+
+        # Then the on-disk cache from previous runs
+        cached = self.disk_cache.get(model_name)
+        if cached is not None:
+            timestamp, stats_dict = cached
+            if time.time() - timestamp < CACHE_TTL:
+                log.debug(f"Using cached stats for: {model_name}")
+                model_stats = ModelStats(**stats_dict)
+                self.model_cache[model_name] = model_stats
+                return model_stats
+
         try:
-            print(f"Getting stats for: {model_name}")
-            
-            # Get downloads
-            downloads_url = f"{self.api_base}/{model_name}?expand[]=downloads&expand[]=downloadsAllTime"
-            downloads_response = self.session.get(downloads_url, timeout=10)
-            downloads_data = downloads_response.json() if downloads_response.status_code == 200 else {}
-            
-            time.sleep(0.1)  # Brief pause between API calls
-            
-            # Get likes
-            likes_url = f"{self.api_base}/{model_name}?expand[]=likes"
-            likes_response = self.session.get(likes_url, timeout=10)
-            likes_data = likes_response.json() if likes_response.status_code == 200 else {}
-            
-            downloads = downloads_data.get('downloads', 0)
-            downloads_all_time = downloads_data.get('downloadsAllTime', 0)
-            likes = likes_data.get('likes', 0)
-            
-            model_stats = {
-                'name': model_name,
-                'url': f"https://huggingface.co/{model_name}",
-                'downloads': downloads,
-                'downloads_all_time': downloads_all_time,
-                'likes': likes
-            }
-            
+            log.debug(f"Getting stats for: {model_name}")
+
+            # Get downloads and likes in a single request
+            stats_url = f"{self.api_base}/{model_name}?expand[]=downloads&expand[]=downloadsAllTime&expand[]=likes"
+            stats_data = orjson.loads(await self._get(stats_url))
+
+            downloads = stats_data.get('downloads', 0)
+            downloads_all_time = stats_data.get('downloadsAllTime', 0)
+            likes = stats_data.get('likes', 0)
+
+            model_stats = ModelStats(
+                name=model_name,
+                url=f"https://huggingface.co/{model_name}",
+                downloads=downloads,
+                downloads_all_time=downloads_all_time,
+                likes=likes
+            )
+
             # Cache the result
-            self.model_cache[model_name] = model_stats
+            self.cache_stats(model_name, model_stats)
             return model_stats
-            
+
         except Exception as e:
-            print(f"Error getting stats for {model_name}: {e}")
-            model_stats = {
-                'name': model_name,
-                'url': f"https://huggingface.co/{model_name}",
-                'downloads': 0,
-                'downloads_all_time': 0,
-                'likes': 0
-            }
+            log.warning(f"Error getting stats for {model_name}: {e}")
+            model_stats = ModelStats(
+                name=model_name,
+                url=f"https://huggingface.co/{model_name}",
+                downloads=0,
+                downloads_all_time=0,
+                likes=0
+            )
             # Cache even failed results to avoid retrying
-            self.model_cache[model_name] = model_stats
+            self.cache_stats(model_name, model_stats)
             return model_stats
-    
-    def scrape_all_languages(self) -> Dict[str, List[Dict]]:
+
+    def cache_stats(self, model_name: str, model_stats: ModelStats):
+        """Store stats in both the in-memory and on-disk caches"""
+        self.model_cache[model_name] = model_stats
+        self.disk_cache[model_name] = (time.time(), asdict(model_stats))
+
+    async def scrape_all_languages(self) -> Dict[str, List[ModelStats]]:
         """Get models for all target languages"""
         results = {}
-        
-        # First, collect all unique model names across all languages
-        print("=== Collecting all model names ===")
-        all_unique_models = set()
-        
-        for language_name, codes in LANGUAGES.items():
-            print(f"Searching for {language_name} models...")
-            for code in codes:
-                model_names = self.get_model_names_for_language(code, max_pages=2)
-                all_unique_models.update(model_names)
-        
-        print(f"Found {len(all_unique_models)} unique models total")
-        
-        # Get stats for all unique models once
-        print("\n=== Getting model stats ===")
-        for model_name in all_unique_models:
-            self.get_model_stats(model_name)
-            time.sleep(0.2)
-        
-        # Now organize by language using cached data
-        print("\n=== Organizing by language ===")
-        for language_name, codes in LANGUAGES.items():
-            print(f"Processing {language_name}...")
-            
-            language_models = set()
-            for code in codes:
-                model_names = self.get_model_names_for_language(code, max_pages=2)
-                language_models.update(model_names)
-            
-            # Get cached stats for this language's models
-            models = []
-            for model_name in language_models:
-                model_stats = self.model_cache[model_name]  # Already cached
-                models.append(model_stats)
-            
-            results[language_name] = models
-            print(f"Found {len(models)} models for {language_name}")
-            
+
+        limits = httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=30)
+        async with httpx.AsyncClient(http2=True, limits=limits, headers=self.headers,
+                                     timeout=10.0) as session:
+            self.session = session
+
+            # First, collect all model names across all languages, keyed by code
+            log.info("=== Collecting all model names ===")
+            # Dedupe codes up front so a code listed under two languages is only fetched once
+            all_codes = sorted({code for codes in LANGUAGES.values() for code in codes})
+            name_lists = await asyncio.gather(
+                *(self.get_model_names_for_language(code) for code in all_codes)
+            )
+            code_to_models: Dict[str, Set[str]] = {
+                code: set(names) for code, names in zip(all_codes, name_lists)
+            }
+
+            all_unique_models = set().union(*code_to_models.values())
+
+            log.info(f"Found {len(all_unique_models)} unique models total")
+
+            # Get stats for all unique models once
+            log.info("=== Getting model stats ===")
+            await asyncio.gather(*(self.get_model_stats(model_name) for model_name in all_unique_models))
+
+            # Now organize by language using cached data
+            log.info("=== Organizing by language ===")
+            for language_name, codes in LANGUAGES.items():
+                log.debug(f"Processing {language_name}...")
+
+                language_models = set().union(*(code_to_models[code] for code in codes))
+
+                # Get cached stats for this language's models
+                models = []
+                for model_name in language_models:
+                    self.model_to_languages[model_name].add(language_name)
+                    model_stats = self.model_cache[model_name]  # Already cached
+                    models.append(model_stats)
+
+                results[language_name] = models
+                log.info(f"Found {len(models)} models for {language_name}")
+
         return results
-    
-    def create_language_matrix(self, results: Dict[str, List[Dict]]) -> pd.DataFrame:
+
+    def create_language_matrix(self) -> pd.DataFrame:
         """Create matrix showing which models support which languages"""
-        
-        # Build model database
-        all_models = {}
-        
-        for language, models in results.items():
-            for model in models:
-                model_name = model['name']
-                if model_name not in all_models:
-                    all_models[model_name] = {
-                        'name': model_name,
-                        'url': model['url'],
-                        'downloads': model['downloads'],
-                        'downloads_all_time': model['downloads_all_time'],
-                        'likes': model['likes'],
-                        'supported_languages': set()
-                    }
-                all_models[model_name]['supported_languages'].add(language)
-        
-        # Create matrix
         languages = list(LANGUAGES.keys())
-        matrix_data = []
-        
-        for model_name, model_info in all_models.items():
-            row = {
-                'Model': model_name,
-                'URL': model_info['url'],
-                'Downloads': model_info['downloads'],
-                'Downloads_All_Time': model_info['downloads_all_time'],
-                'Likes': model_info['likes'],
-                'Languages_Supported': len(model_info['supported_languages'])
-            }
-            
-            # Add language columns
-            for language in languages:
-                row[language] = 'Yes' if language in model_info['supported_languages'] else 'No'
-            
-            matrix_data.append(row)
-        
-        # Create DataFrame and sort
-        df = pd.DataFrame(matrix_data)
+
+        # Long format: one row per (model, language) pair, straight from the
+        # model-to-languages index built during scraping
+        rows = [
+            (model_name, language, stats.url, stats.downloads,
+             stats.downloads_all_time, stats.likes)
+            for model_name, model_languages in self.model_to_languages.items()
+            for stats in [self.model_cache[model_name]]
+            for language in model_languages
+        ]
+        df_long = pd.DataFrame(rows, columns=[
+            'Model', 'Language', 'URL', 'Downloads', 'Downloads_All_Time', 'Likes'
+        ])
+
+        # Pivot language support into one column per language
+        support = (
+            df_long.assign(support=1)
+            .pivot_table(index='Model', columns='Language', values='support', fill_value=0)
+            .astype(bool)
+            .reindex(columns=languages, fill_value=False)
+        )
+
+        # Per-model stats are identical across languages, so take the first occurrence
+        stats = df_long.drop(columns='Language').groupby('Model').first()
+
+        df = stats.join(support.replace({True: 'Yes', False: 'No'}))
+        df['Languages_Supported'] = support.sum(axis=1)
+
+        df = df.reset_index()[['Model', 'URL', 'Downloads', 'Downloads_All_Time',
+                               'Likes', 'Languages_Supported'] + languages]
         df = df.sort_values(['Languages_Supported', 'Likes'], ascending=[False, False])
-        
+
         return df
-    
-    def save_results(self, results: Dict[str, List[Dict]], matrix: pd.DataFrame):
+
+    def save_results(self, results: Dict[str, List[ModelStats]], matrix: pd.DataFrame):
         """Save results to CSV files"""
-        
+
         # Save individual language files
         for language, models in results.items():
             if models:
-                df = pd.DataFrame(models)
                 filename = f"asr_models_{language.lower()}.csv"
-                df.to_csv(filename, index=False)
-                print(f"Saved {len(models)} {language} models to {filename}")
-        
+                with open(filename, 'w', newline='') as f:
+                    writer = csv.DictWriter(f, fieldnames=['name', 'url', 'downloads',
+                                                           'downloads_all_time', 'likes'])
+                    writer.writeheader()
+                    writer.writerows(asdict(model) for model in models)
+                log.info(f"Saved {len(models)} {language} models to {filename}")
+
         # Save matrix
         matrix.to_csv("asr_language_support_matrix.csv", index=False)
-        print(f"Saved language support matrix to asr_language_support_matrix.csv")
-        
+        log.info("Saved language support matrix to asr_language_support_matrix.csv")
+
         # Show preview
         print("\n=== Top 10 Models by Language Support ===")
         preview_columns = ['Model', 'Languages_Supported', 'Downloads', 'Likes'] + list(LANGUAGES.keys())
@@ -247,25 +281,27 @@ class HuggingFaceASRScraper:
 
 
 def main():
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
     scraper = HuggingFaceASRScraper()
-    
+
     print("Starting ASR model search for African languages...")
     print(f"Target languages: {list(LANGUAGES.keys())}")
-    
+
     # Get all models
-    results = scraper.scrape_all_languages()
-    
+    results = asyncio.run(scraper.scrape_all_languages())
+
     # Create matrix
-    matrix = scraper.create_language_matrix(results)
-    
+    matrix = scraper.create_language_matrix()
+
     # Save results
     scraper.save_results(results, matrix)
-    
+
     # Summary
     print(f"\n=== Summary ===")
-    total_models = len(set(model['name'] for models in results.values() for model in models))
+    total_models = len(set(model.name for models in results.values() for model in models))
     print(f"Total unique models found: {total_models}")
-    
+
     for language, models in results.items():
         print(f"{language}: {len(models)} models")
 